@@ -0,0 +1,129 @@
+import atexit
+import copy
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import Optional
+
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json").lower()  # "json" or "text"
+# Fraction of successful requests that get an access log line (errors are always logged)
+LOG_REQUEST_SAMPLE_RATE = float(os.getenv("LOG_REQUEST_SAMPLE_RATE", "0.01"))
+
+# Task being worked on by the current asyncio task, attached to every log record
+task_id_var: ContextVar[Optional[str]] = ContextVar("task_id", default=None)
+
+# Loggers that install their own synchronous stream handlers
+_LIBRARY_LOGGERS = ["browser_use", "uvicorn", "uvicorn.error", "uvicorn.access"]
+
+_queue_handler: Optional[logging.handlers.QueueHandler] = None
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+class TaskContextFilter(logging.Filter):
+    """Stamp records with the current task_id; runs in the caller's context, before queueing"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if not hasattr(record, "task_id"):
+            record.task_id = task_id_var.get()
+        return True
+
+
+class RequestSamplingFilter(logging.Filter):
+    """Keep a sample of successful access log lines, and every 4xx/5xx"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        args = record.args if isinstance(record.args, tuple) else ()
+        status = args[4] if len(args) >= 5 else None
+        if isinstance(status, int) and status >= 400:
+            return True
+        return random.random() < LOG_REQUEST_SAMPLE_RATE
+
+
+class TracebackQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler that renders the traceback into exc_text instead of folding it into the
+    message, so the JSON formatter can put it in its own field.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+        if record.exc_info:
+            # Render now: the traceback would keep every frame alive until the listener got to it
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        if getattr(record, "task_id", None):
+            entry["task_id"] = record.task_id
+        if record.exc_text:
+            entry["exc_info"] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+def setup_logging() -> None:
+    """
+    Route all logging through a queue, so callers on the event loop only enqueue records
+    and a background thread does the formatting and writing. Safe to call more than once.
+    """
+    global _queue_handler, _listener
+    if _queue_handler is None:
+        stream_handler = logging.StreamHandler(sys.stdout)
+        if LOG_FORMAT == "json":
+            stream_handler.setFormatter(JsonFormatter())
+        else:
+            stream_handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s [%(name)s] [%(task_id)s] %(message)s"))
+
+        _queue_handler = TracebackQueueHandler(queue.SimpleQueue())
+        _queue_handler.addFilter(TaskContextFilter())
+        _listener = logging.handlers.QueueListener(_queue_handler.queue, stream_handler, respect_handler_level=True)
+        _listener.start()
+        atexit.register(_listener.stop)
+
+        root = logging.getLogger()
+        root.handlers = [_queue_handler]
+        root.setLevel(LOG_LEVEL)
+
+    route_library_loggers()
+
+
+def route_library_loggers() -> None:
+    """
+    Replace the synchronous handlers that libraries (browser_use, uvicorn) install on their
+    own loggers. Call again after importing such a library.
+    """
+    if _queue_handler is None:
+        return
+    for name in _LIBRARY_LOGGERS:
+        logger = logging.getLogger(name)
+        logger.handlers = []
+        logger.propagate = True
+
+    access_logger = logging.getLogger("uvicorn.access")
+    if not any(isinstance(f, RequestSamplingFilter) for f in access_logger.filters):
+        access_logger.addFilter(RequestSamplingFilter())
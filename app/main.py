@@ -1,16 +1,28 @@
+import time
+
+_import_started = time.perf_counter()
+
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, Depends, HTTPException, Path
+from fastapi.responses import JSONResponse
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from pydantic import BaseModel
+from pydantic import BaseModel, Field, HttpUrl
 import uvicorn
 import os
 import uuid
+import secrets
 import logging
-from typing import Dict
+from typing import Dict, List, Optional
 import asyncio
 from dotenv import load_dotenv
 
-from app.services.browser.browser_agent import create_browser_agent
+from app.logging_config import setup_logging
 from app.services.task_manager import TaskManager, TaskStatus
+from app.services.profile_store import ProfileStore
+from app.services.webhook_dispatcher import WebhookDispatcher
+from app.services.memory_watchdog import MemoryWatchdog
+from app.services.health import HealthMonitor
+from app.services.warmup import Warmup
 
 # Load environment variables
 load_dotenv()
@@ -18,7 +30,37 @@ load_dotenv()
 # Get API key from environment
 API_KEY = os.getenv("API_KEY", "default_insecure_key")
 
-app = FastAPI()
+# JSON logs written from a background thread, with sampled access logs
+setup_logging()
+
+IMPORT_SECONDS = time.perf_counter() - _import_started
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Start background services and return quickly so the port opens fast. The heavy browser
+    stack is imported and warmed up in the background, and interrupted tasks are resumed.
+    """
+    lifespan_started = time.perf_counter()
+
+    # Sample memory, recycle bloated browsers and shed load near the limit
+    MemoryWatchdog.start()
+    app.state.warmup_task = asyncio.create_task(Warmup.run())
+    # Resume tasks that were checkpointed before a crash or redeploy
+    app.state.resume_task = asyncio.create_task(TaskManager.resume_interrupted_tasks())
+
+    Warmup.record_startup(IMPORT_SECONDS, IMPORT_SECONDS + time.perf_counter() - lifespan_started)
+    yield
+
+    app.state.warmup_task.cancel()
+    # Deliver batched completion callbacks before the process exits
+    await WebhookDispatcher.close()
+    await MemoryWatchdog.stop()
+    await HealthMonitor.close()
+
+
+app = FastAPI(lifespan=lifespan)
 security = HTTPBearer()
 
 
@@ -27,15 +69,16 @@ class TaskRequest(BaseModel):
     task: str
     model_provider: str = "openai_chat"
     model_name: str = "gpt-4o"
+    browser_profile: Optional[str] = None  # Named profile to start logged in with, updated when the task ends
+    items: Optional[List[str]] = None  # Fan out: run one sub-agent per item, "{item}" in task is replaced
+    callback_url: Optional[HttpUrl] = None  # Receives a POST with the final output when the task ends
+    deadline_seconds: Optional[float] = Field(None, gt=0)  # Wall-clock budget, including time spent queued
+    max_steps: Optional[int] = Field(None, gt=0)  # Step budget per agent
 
 
 # Verify token function
 def verify_token(credentials: HTTPAuthorizationCredentials = Depends(security)):
-    logging.info(f"Received token: {credentials.credentials}")
-    logging.info(f"Expected token: {API_KEY}")
-    logging.info(f"Match? {credentials.credentials == API_KEY}")
-
-    if credentials.credentials != API_KEY:
+    if not secrets.compare_digest(credentials.credentials.encode(), API_KEY.encode()):
         raise HTTPException(status_code=401, detail="Invalid authentication credentials")
     return credentials.credentials
 
@@ -44,12 +87,38 @@ def verify_token(credentials: HTTPAuthorizationCredentials = Depends(security)):
 async def run_task(request: TaskRequest, token: str = Depends(verify_token)):
     """
     Create and start a new automation task.
+
+    If items are given, the task is fanned out into one concurrent sub-task per item
+    and their outputs are merged into the parent task's output.
     """
     try:
+        if request.items is not None:
+            task_id, child_ids = await TaskManager.create_fanout_task(
+                task=request.task,
+                items=request.items,
+                model_provider=request.model_provider,
+                model_name=request.model_name,
+                browser_profile=request.browser_profile,
+                callback_url=str(request.callback_url) if request.callback_url else None,
+                deadline_seconds=request.deadline_seconds,
+                max_steps=request.max_steps
+            )
+            return {
+                "status": "success",
+                "message": f"Processing task: {request.task} ({len(child_ids)} sub-tasks)",
+                "task_id": str(task_id),
+                "child_task_ids": [str(child_id) for child_id in child_ids],
+                "live_url": None
+            }
+
         task_id, live_url = await TaskManager.create_task(
             task=request.task,
             model_provider=request.model_provider,
-            model_name=request.model_name
+            model_name=request.model_name,
+            browser_profile=request.browser_profile,
+            callback_url=str(request.callback_url) if request.callback_url else None,
+            deadline_seconds=request.deadline_seconds,
+            max_steps=request.max_steps
         )
 
         return {
@@ -58,10 +127,10 @@ async def run_task(request: TaskRequest, token: str = Depends(verify_token)):
             "task_id": str(task_id),
             "live_url": live_url
         }
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
-        logging.error(f"Error processing task: {e}")
-        import traceback
-        traceback.print_exc()
+        logging.exception(f"Error processing task: {e}")
         raise HTTPException(status_code=500, detail=f"Error processing task: {str(e)}")
 
 
@@ -140,6 +209,7 @@ async def get_task_status_only(
     - stopped: Task was manually stopped
     - paused: Task execution is temporarily paused
     - failed: Task encountered an error and could not complete
+    - timed_out: Task exceeded its deadline or step budget
     """
     try:
         status = await TaskManager.get_task_status(task_id)
@@ -169,11 +239,72 @@ async def get_task_details(
         logging.error(f"Error getting task details: {e}")
         raise HTTPException(status_code=500, detail=f"Error getting task details: {str(e)}")
 
+@app.get("/api/v1/browser-profiles")
+async def list_browser_profiles(token: str = Depends(verify_token)):
+    """
+    List the names of all stored browser profiles.
+    """
+    return {"profiles": ProfileStore.list_profiles()}
+
+
+@app.delete("/api/v1/browser-profiles/{name}")
+async def delete_browser_profile(
+        name: str = Path(..., description="The name of the browser profile to delete"),
+        token: str = Depends(verify_token)
+):
+    """
+    Delete a stored browser profile, so the next task using it starts logged out.
+    """
+    try:
+        if ProfileStore.delete(name):
+            return {"status": "success", "message": f"Browser profile {name} deleted."}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    raise HTTPException(status_code=404, detail=f"Browser profile {name} not found.")
+
+
+@app.get("/api/v1/webhooks/metrics")
+async def get_webhook_metrics(token: str = Depends(verify_token)):
+    """
+    Get completion webhook delivery metrics.
+    """
+    return WebhookDispatcher.get_metrics()
+
+
+@app.get("/api/v1/memory")
+async def get_memory_report(token: str = Depends(verify_token)):
+    """
+    Get the latest memory sample of the API process and container, and of each task's browser.
+    """
+    return MemoryWatchdog.get_report()
+
+
 @app.get("/health")
 async def health_check():
     return {"status": "healthy"}
 
 
+@app.get("/health/ready")
+async def readiness_check():
+    """
+    Readiness probe for load balancers and autoscalers.
+
+    Reports the (cached) browser probe, the Anchor circuit state and live capacity:
+    free task slots, queue depth and pool occupancy. Responds 503 when not ready.
+    """
+    report = await HealthMonitor.readiness()
+    return JSONResponse(report, status_code=200 if report["status"] == "ready" else 503)
+
+
+@app.get("/health/startup")
+async def startup_report():
+    """
+    Startup timing: module import time, time until the server was ready, and the
+    duration and outcome of each background warm-up step.
+    """
+    return Warmup.get_report()
+
+
 if __name__ == "__main__":
     print("--- Starting FastAPI server using Uvicorn ---")
     print(
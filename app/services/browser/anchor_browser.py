@@ -2,16 +2,77 @@ import requests
 from dotenv import load_dotenv
 from httpx import AsyncClient
 
+import logging
 import os
+import time
 
 # Load environment variables
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 ANCHOR_API_KEY = os.getenv("ANCHOR_API_KEY")
+# Consecutive failures after which Anchor is skipped, and for how long
+ANCHOR_CIRCUIT_FAILURE_THRESHOLD = int(os.getenv("ANCHOR_CIRCUIT_FAILURE_THRESHOLD", "3"))
+ANCHOR_CIRCUIT_RESET_SECONDS = float(os.getenv("ANCHOR_CIRCUIT_RESET_SECONDS", "60"))
+
+
+class AnchorCircuit:
+    """
+    Circuit breaker for the Anchor Browser API.
+
+    After ANCHOR_CIRCUIT_FAILURE_THRESHOLD consecutive failures the circuit opens and session
+    creation is skipped (callers fall back to a local browser) for ANCHOR_CIRCUIT_RESET_SECONDS.
+    Then a single trial request is let through (half open); its outcome closes or reopens the circuit.
+    """
+
+    _failures: int = 0
+    _opened_at: float | None = None
+    _trial_in_flight: bool = False
+
+    @classmethod
+    def state(cls) -> str:
+        if cls._opened_at is None:
+            return "closed"
+        if time.monotonic() - cls._opened_at < ANCHOR_CIRCUIT_RESET_SECONDS:
+            return "open"
+        return "half_open"
 
+    @classmethod
+    def allow_request(cls) -> bool:
+        state = cls.state()
+        if state == "closed":
+            return True
+        if state == "half_open" and not cls._trial_in_flight:
+            cls._trial_in_flight = True
+            return True
+        return False
+
+    @classmethod
+    def record_success(cls) -> None:
+        cls._failures = 0
+        cls._opened_at = None
+        cls._trial_in_flight = False
+
+    @classmethod
+    def record_failure(cls) -> None:
+        cls._failures += 1
+        cls._trial_in_flight = False
+        if cls._failures >= ANCHOR_CIRCUIT_FAILURE_THRESHOLD:
+            if cls._opened_at is None:
+                logger.warning(f"Anchor Browser circuit opened after {cls._failures} consecutive failures")
+            cls._opened_at = time.monotonic()
+
+    @classmethod
+    def snapshot(cls) -> dict:
+        return {"state": cls.state(), "consecutive_failures": cls._failures}
 
 
 async def create_anchor_browser_session():
+    if not AnchorCircuit.allow_request():
+        logger.debug("Anchor Browser circuit is open, skipping session creation")
+        return None, None, None
+
     try:
         async with AsyncClient() as client:
             response = await client.post(
@@ -28,19 +89,20 @@ async def create_anchor_browser_session():
             )
 
             response.raise_for_status()
-            response_json = response.json()
-
-            print("Anchor Browser session created successfully!")
-            print(f"Response: {response_json}")
-
-            session_data = response_json["data"]
-            print(f"Session data: {session_data}")
+            session_data = response.json()["data"]
+            # The response holds connection URLs, so only the session id is logged
+            logger.info(f"Anchor Browser session {session_data['id']} created")
 
+            AnchorCircuit.record_success()
             return (
                 session_data['id'],
                 session_data['cdp_url'],
                 session_data.get('live_view_url')
             )
     except Exception as e:
-        print(f"Error creating Anchor Browser session: {e}")
-        return None, None, None
\ No newline at end of file
+        AnchorCircuit.record_failure()
+        logger.error(f"Error creating Anchor Browser session: {e}")
+        return None, None, None
+    finally:
+        # A cancelled trial request must not keep the circuit half open forever
+        AnchorCircuit._trial_in_flight = False
\ No newline at end of file
@@ -3,27 +3,174 @@
 
 import asyncio
 import argparse
+import json
 import os
 import logging
+import time
 import urllib.parse
+from datetime import datetime, timezone
 from dotenv import load_dotenv
 
 # Load environment variables
 load_dotenv()
 
 # Import from your existing modules
+from app.logging_config import setup_logging
 from app.services.browser.anchor_browser import create_anchor_browser_session
 from app.services.llm_factory import LLMFactory
+from app.services.profile_store import ProfileStore
 from browser_use import Agent, Browser
 from browser_use.browser.browser import BrowserConfig
+from browser_use.browser.context import BrowserContext
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
+# Configure logging; browser_use installs its own stream handler on import, route it through ours
+setup_logging()
 logger = logging.getLogger(__name__)
 
 
-async def create_browser_agent(task, model_provider: str = "openai_chat", model_name: str = "gpt-4o") -> tuple[
+# Restores localStorage entries for the current origin before any page script runs
+_LOCAL_STORAGE_INIT_SCRIPT = """
+(origins) => {
+    try {
+        const entry = origins.find(o => o.origin === window.location.origin);
+        if (!entry) return;
+        for (const item of entry.localStorage) {
+            if (window.localStorage.getItem(item.name) === null) {
+                window.localStorage.setItem(item.name, item.value);
+            }
+        }
+    } catch (e) {}
+}
+"""
+
+
+async def apply_storage_state(browser_context, storage_state: dict) -> None:
+    """
+    Load a Playwright storage state (cookies and localStorage) into a browser context.
+    """
+    session = await browser_context.get_session()
+    cookies = storage_state.get("cookies") or []
+    if cookies:
+        await session.context.add_cookies(cookies)
+    origins = storage_state.get("origins") or []
+    if origins:
+        await session.context.add_init_script(script=f"({_LOCAL_STORAGE_INIT_SCRIPT})({json.dumps(origins)})")
+    logger.info(f"Restored {len(cookies)} cookies and localStorage for {len(origins)} origins")
+
+
+async def capture_browser_state(browser_context) -> dict | None:
+    """
+    Capture the current URL and storage state of a browser context.
+
+    Returns:
+        dict: {"url": ..., "storage_state": ...} or None if the context has no open session
+    """
+    if browser_context is None or browser_context.session is None:
+        return None
+    page = await browser_context.get_current_page()
+    storage_state = await browser_context.session.context.storage_state()
+    return {"url": page.url, "storage_state": storage_state}
+
+
+async def _create_agent(task, browser, model_provider, model_name, storage_state=None, **agent_kwargs) -> Agent:
+    """
+    Build an Agent on the given browser, optionally seeding its context with a storage state.
+
+    The browser context is created here and injected, so the agent does not close it when
+    its run ends - the state can still be captured afterwards. Use close_browser_agent to clean up.
+    """
+    browser_context = BrowserContext(browser=browser, config=browser.config.new_context_config)
+    if storage_state:
+        await apply_storage_state(browser_context, storage_state)
+    agent = Agent(
+        task=task,
+        llm=LLMFactory.create_llm(model_provider, model_name=model_name),
+        browser=browser,
+        browser_context=browser_context,
+        **agent_kwargs
+    )
+    _guard_steps(agent)
+    return agent
+
+
+def _guard_steps(agent: Agent) -> None:
+    """Hold agent.step_lock for the duration of every step, so the browser can be swapped between steps"""
+    agent.step_lock = asyncio.Lock()
+    step = agent.step
+
+    async def locked_step(*args, **kwargs):
+        async with agent.step_lock:
+            return await step(*args, **kwargs)
+
+    agent.step = locked_step
+
+
+async def recycle_agent_browser(agent: Agent) -> bool:
+    """
+    Replace an agent's local browser with a fresh one between two steps.
+
+    The URL, cookies and localStorage are carried over. Remote (CDP) browsers such as
+    Anchor sessions are left alone, since their memory is not ours to reclaim.
+
+    Returns:
+        bool: True if the browser was replaced
+    """
+    if agent.browser is None or agent.browser.config.cdp_url:
+        return False
+
+    async with agent.step_lock:
+        browser_state = await capture_browser_state(agent.browser_context)
+        config = agent.browser.config
+        await close_browser_agent(agent)
+
+        browser = Browser(config=config)
+        browser_context = BrowserContext(browser=browser, config=config.new_context_config)
+        if browser_state:
+            await apply_storage_state(browser_context, browser_state["storage_state"])
+            if browser_state["url"].startswith("http"):
+                page = await browser_context.get_current_page()
+                await page.goto(browser_state["url"])
+
+        agent.browser = browser
+        agent.browser_context = browser_context
+    return True
+
+
+async def get_browser_pids(browser) -> list[int]:
+    """
+    OS process IDs of a local browser (browser, renderer, GPU, ...), queried over CDP.
+
+    Returns an empty list for remote browsers or ones that have not been launched yet.
+    """
+    if browser is None or browser.config.cdp_url or browser.config.wss_url or browser.playwright_browser is None:
+        return []
+    session = await browser.playwright_browser.new_browser_cdp_session()
+    try:
+        info = await session.send("SystemInfo.getProcessInfo")
+    finally:
+        await session.detach()
+    return [process["id"] for process in info.get("processInfo", [])]
+
+
+async def close_browser_agent(agent: Agent) -> None:
+    """Close the browser context and browser owned by an agent from create_browser_agent"""
+    try:
+        await agent.browser_context.close()
+    finally:
+        if agent.browser:
+            await agent.browser.close()
+
+
+async def create_browser_agent(task, model_provider: str = "openai_chat", model_name: str = "gpt-4o",
+                               initial_actions=None, message_context=None, storage_state=None,
+                               browser_profile: str = None) -> tuple[
     Agent, str]:
+    # A named profile seeds the browser with saved logins unless an explicit state is given
+    if storage_state is None and browser_profile:
+        storage_state = ProfileStore.load(browser_profile)
+        if storage_state:
+            logger.info(f"Using browser profile: {browser_profile}")
+
     # First try to create an Anchor Browser session
     try:
         logger.info("Attempting to create Anchor Browser session...")
@@ -45,10 +192,11 @@ async def create_browser_agent(task, model_provider: str = "openai_chat", model_
 
             # Initialize browser with config
             browser = Browser(config=browser_config)
-            agent = Agent(
-                task=task,
-                llm=LLMFactory.create_llm(model_provider, model_name=model_name),
-                browser=browser
+            agent = await _create_agent(
+                task, browser, model_provider, model_name,
+                storage_state=storage_state,
+                initial_actions=initial_actions,
+                message_context=message_context
             )
 
             return agent, live_view_url
@@ -86,10 +234,11 @@ async def create_browser_agent(task, model_provider: str = "openai_chat", model_
 
     # Initialize browser with config
     browser = Browser(config=browser_config)
-    agent = Agent(
-        task=task,
-        llm=LLMFactory.create_llm(model_provider, model_name=model_name),
-        browser=browser
+    agent = await _create_agent(
+        task, browser, model_provider, model_name,
+        storage_state=storage_state,
+        initial_actions=initial_actions,
+        message_context=message_context
     )
 
     # No live view URL for local browser
@@ -126,7 +275,10 @@ async def run_agent(task, model_provider, model_name):
         print(f"{'=' * 80}\n")
 
         # Run the agent with the specified maximum steps
-        result = await agent.run()
+        try:
+            result = await agent.run()
+        finally:
+            await close_browser_agent(agent)
 
         # Print the final result
         print(f"\n{'=' * 80}")
@@ -141,19 +293,150 @@ async def run_agent(task, model_provider, model_name):
         raise
 
 
+def _completed_lines(output_path) -> set:
+    """Input line numbers that already have a result in an output file"""
+    if not os.path.exists(output_path):
+        return set()
+    completed = set()
+    with open(output_path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                completed.add(json.loads(line)["line"])
+            except (ValueError, KeyError):
+                continue  # Partially written last line of an interrupted run
+    return completed
+
+
+async def _run_batch_item(line_no, line, model_provider, model_name, max_steps) -> dict:
+    """Run the agent for one JSONL input line and build its result record"""
+    record = {"line": line_no, "id": None, "task": None, "status": "failed", "output": None, "error": None,
+              "started_at": datetime.now(timezone.utc).isoformat(), "duration_seconds": None,
+              "steps": 0, "input_tokens": 0}
+    started = time.monotonic()
+    try:
+        entry = json.loads(line)
+        record["id"] = entry.get("id")
+        record["task"] = entry["task"]
+
+        agent, _ = await create_browser_agent(
+            task=entry["task"],
+            model_provider=entry.get("model_provider", model_provider),
+            model_name=entry.get("model_name", model_name)
+        )
+        try:
+            history = await agent.run(max_steps=entry.get("max_steps", max_steps))
+        finally:
+            await close_browser_agent(agent)
+
+        # A run that hits max_steps is forced to end with a (failed) done action, so check success
+        record["status"] = "finished" if history.is_successful() else "incomplete"
+        record["output"] = history.final_result()
+        record["steps"] = len(history.history)
+        record["input_tokens"] = history.total_input_tokens()  # browser_use only counts prompt tokens
+    except Exception as e:
+        record["error"] = str(e)
+        logger.error(f"Batch line {line_no} failed: {e}")
+    record["duration_seconds"] = round(time.monotonic() - started, 3)
+    return record
+
+
+async def run_batch(input_path, output_path, model_provider: str = "openai_chat", model_name: str = "gpt-4o",
+                    concurrency: int = 4, offset: int = 0, resume: bool = False, max_steps: int = 100):
+    """
+    Run every task of a JSONL file through real browser agents, a few at a time.
+
+    Each input line is an object with a "task" and optionally "id", "model_provider",
+    "model_name" and "max_steps". One result line is appended to the output file as soon
+    as each task ends, so an interrupted batch can continue with offset or resume.
+    """
+    skip = _completed_lines(output_path) if resume else set()
+    queue = asyncio.Queue(maxsize=concurrency * 2)  # Stream the input instead of loading it all
+    counts = {"finished": 0, "incomplete": 0, "failed": 0}
+
+    async def produce():
+        with open(input_path, "r", encoding="utf-8") as f:
+            for line_no, line in enumerate(f):
+                if line_no < offset or line_no in skip or not line.strip():
+                    continue
+                await queue.put((line_no, line))
+        for _ in range(concurrency):
+            await queue.put(None)
+
+    async def work(out):
+        while (item := await queue.get()) is not None:
+            record = await _run_batch_item(*item, model_provider, model_name, max_steps)
+            out.write(json.dumps(record) + "\n")
+            out.flush()
+            counts[record["status"]] += 1
+            print(f"[line {record['line']}] {record['status']} in {record['duration_seconds']}s")
+
+    print(f"\n🚀 Running batch {input_path} -> {output_path} (concurrency {concurrency})")
+    if skip:
+        print(f"Skipping {len(skip)} lines already in {output_path}")
+    started = time.monotonic()
+    # Terminate a partially written last line so new records start on their own line
+    partial_line = False
+    if os.path.exists(output_path) and os.path.getsize(output_path) > 0:
+        with open(output_path, "rb") as f:
+            f.seek(-1, os.SEEK_END)
+            partial_line = f.read(1) != b"\n"
+
+    with open(output_path, "a", encoding="utf-8") as out:
+        if partial_line:
+            out.write("\n")
+        await asyncio.gather(produce(), *(work(out) for _ in range(concurrency)))
+
+    print(f"\n{'=' * 80}")
+    print(f"✅ Batch complete in {time.monotonic() - started:.1f}s: "
+          f"{counts['finished']} finished, {counts['incomplete']} incomplete, {counts['failed']} failed")
+    print(f"{'=' * 80}\n")
+    return counts
+
+
+def _positive_int(value: str) -> int:
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {value}")
+    return number
+
+
 def main():
     """Parse command line arguments and run the agent"""
     parser = argparse.ArgumentParser(description="Test Browser Agent")
-    parser.add_argument("task", help="The task to execute")
+    parser.add_argument("task", nargs="?", help="The task to execute")
     parser.add_argument("--provider", default="openai_chat", help="Model provider (default: openai_chat)")
     parser.add_argument("--model", default="gpt-4o", help="Model name (default: gpt-4o)")
+    parser.add_argument("--batch", metavar="JSONL", help="Run every task in a JSONL file with browser agents")
+    parser.add_argument("--output", default="batch_results.jsonl",
+                        help="JSONL file results are appended to in batch mode. Each record has the status, output, "
+                             "steps and input_tokens (prompt tokens only; browser_use does not count completion "
+                             "tokens) (default: batch_results.jsonl)")
+    parser.add_argument("--concurrency", type=_positive_int, default=4,
+                        help="Agents running at once in batch mode (default: 4)")
+    parser.add_argument("--offset", type=int, default=0, help="Skip the first N input lines in batch mode")
+    parser.add_argument("--resume", action="store_true", help="Skip input lines that already have a result")
+    parser.add_argument("--max-steps", type=_positive_int, default=100, help="Step budget per batch task (default: 100)")
     args = parser.parse_args()
 
-    asyncio.run(run(
-        task=args.task,
-        model_provider=args.provider,
-        model_name=args.model,
-    ))
+    if args.batch:
+        asyncio.run(run_batch(
+            input_path=args.batch,
+            output_path=args.output,
+            model_provider=args.provider,
+            model_name=args.model,
+            concurrency=args.concurrency,
+            offset=args.offset,
+            resume=args.resume,
+            max_steps=args.max_steps,
+        ))
+    elif args.task:
+        asyncio.run(run(
+            task=args.task,
+            model_provider=args.provider,
+            model_name=args.model,
+        ))
+    else:
+        parser.error("either a task or --batch is required")
 
 
 if __name__ == "__main__":
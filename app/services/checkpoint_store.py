@@ -0,0 +1,121 @@
+import json
+import logging
+import os
+import shutil
+import uuid
+from typing import Dict, List, Optional
+
+from cryptography.fernet import Fernet, InvalidToken
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+# Directory where task checkpoints are persisted (mount a volume here in production)
+CHECKPOINT_DIR = os.getenv("TASK_CHECKPOINT_DIR", "data/checkpoints")
+# Fernet key encrypting the browser storage state in checkpoints; defaults to the profile key.
+# Without a key, checkpoints keep no storage state and resumed tasks start logged out
+# (or from their browser profile).
+CHECKPOINT_KEY = os.getenv("TASK_CHECKPOINT_KEY") or os.getenv("BROWSER_PROFILE_KEY")
+
+
+class CheckpointStore:
+    """
+    Durable on-disk store for task checkpoints.
+
+    Each task gets its own directory containing:
+        state.json   - task metadata, status, current URL and the encrypted browser storage state
+        history.json - the agent history, serialized by browser_use itself
+    """
+
+    _base_dir: str = CHECKPOINT_DIR
+    _key: Optional[str] = CHECKPOINT_KEY
+
+    @classmethod
+    def _task_dir(cls, task_id: uuid.UUID) -> str:
+        return os.path.join(cls._base_dir, str(task_id))
+
+    @classmethod
+    def history_path(cls, task_id: uuid.UUID) -> str:
+        """Path of the agent history file for a task"""
+        return os.path.join(cls._task_dir(task_id), "history.json")
+
+    @classmethod
+    def save(cls, task_id: uuid.UUID, state: dict, history=None) -> None:
+        """
+        Write a checkpoint for a task.
+
+        Files are written to a temporary path and atomically renamed, so a crash
+        mid-write never leaves a truncated checkpoint behind.
+
+        Args:
+            task_id (uuid.UUID): The ID of the task
+            state (dict): JSON-serializable task state
+            history (AgentHistoryList, optional): The agent history to persist
+        """
+        task_dir = cls._task_dir(task_id)
+        os.makedirs(task_dir, exist_ok=True)
+
+        if history is not None:
+            history_path = cls.history_path(task_id)
+            history.save_to_file(history_path + ".tmp")
+            os.replace(history_path + ".tmp", history_path)
+
+        # Cookies and localStorage are credentials: never write them in plaintext
+        state = dict(state)
+        storage_state = state.pop("storage_state", None)
+        if storage_state and cls._key:
+            token = Fernet(cls._key).encrypt(json.dumps(storage_state).encode("utf-8"))
+            state["storage_state_encrypted"] = token.decode("ascii")
+
+        state_path = os.path.join(task_dir, "state.json")
+        with open(state_path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(state, f)
+        os.replace(state_path + ".tmp", state_path)
+
+    @classmethod
+    def load(cls, task_id: uuid.UUID) -> Optional[dict]:
+        """
+        Load the checkpointed state of a task.
+
+        Returns:
+            dict: The saved state, or None if no checkpoint exists
+        """
+        state_path = os.path.join(cls._task_dir(task_id), "state.json")
+        if not os.path.exists(state_path):
+            return None
+        with open(state_path, "r", encoding="utf-8") as f:
+            state = json.load(f)
+
+        token = state.pop("storage_state_encrypted", None)
+        state["storage_state"] = None
+        if token and cls._key:
+            try:
+                state["storage_state"] = json.loads(Fernet(cls._key).decrypt(token.encode("ascii")))
+            except InvalidToken:
+                logging.warning(f"Cannot decrypt the storage state of checkpoint {task_id}, resuming without it")
+        return state
+
+    @classmethod
+    def list_checkpoints(cls) -> List[Dict]:
+        """
+        Load every checkpoint in the store, skipping unreadable ones.
+        """
+        if not os.path.isdir(cls._base_dir):
+            return []
+
+        checkpoints = []
+        for name in os.listdir(cls._base_dir):
+            try:
+                state = cls.load(uuid.UUID(name))
+            except Exception as e:
+                logging.warning(f"Skipping unreadable checkpoint {name}: {e}")
+                continue
+            if state:
+                checkpoints.append(state)
+        return checkpoints
+
+    @classmethod
+    def delete(cls, task_id: uuid.UUID) -> None:
+        """Remove a task's checkpoint once it no longer needs to be resumed"""
+        shutil.rmtree(cls._task_dir(task_id), ignore_errors=True)
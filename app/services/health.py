@@ -0,0 +1,159 @@
+import asyncio
+import os
+import time
+from datetime import datetime, timezone
+from typing import Optional
+
+from dotenv import load_dotenv
+
+from app.services.browser.anchor_browser import ANCHOR_API_KEY, AnchorCircuit
+from app.services.task_manager import TaskManager, TaskStatus
+
+# Load environment variables
+load_dotenv()
+
+# How long a browser probe result is reused before probing again
+HEALTH_CACHE_SECONDS = float(os.getenv("HEALTH_CACHE_SECONDS", "5"))
+HEALTH_PROBE_TIMEOUT_SECONDS = float(os.getenv("HEALTH_PROBE_TIMEOUT_SECONDS", "5"))
+# Keep a dedicated Chromium (launched by the warm-up) to probe when no task has a local browser
+# running. It costs one idle browser's memory; when disabled, the browser check of an idle
+# replica is "unknown" and readiness then depends on Anchor being usable.
+HEALTH_DEDICATED_BROWSER = os.getenv("HEALTH_DEDICATED_BROWSER", "true").lower() == "true"
+
+
+class HealthMonitor:
+    """
+    Readiness checks for load balancers and autoscalers.
+
+    The browser probe opens a throwaway page in a local browser that is already running for
+    a task, or else in the dedicated probe browser kept open since the warm-up, instead of
+    launching a fresh browser per check like playwright_healthcheck.py.
+    Its result is cached for HEALTH_CACHE_SECONDS; capacity numbers are always live.
+    """
+
+    _playwright = None
+    _dedicated_browser = None
+    _probe_lock: Optional[asyncio.Lock] = None
+    _probe_result: Optional[dict] = None
+    _probed_at: float = 0.0
+
+    @classmethod
+    def _warm_browser(cls):
+        """A connected local Playwright browser owned by an active task, if any"""
+        for agent, status in list(TaskManager._running_agents.values()):
+            if status not in [TaskStatus.RUNNING, TaskStatus.PAUSED]:
+                continue
+            browser = getattr(agent, "browser", None)
+            if browser is None or browser.config.cdp_url or browser.config.wss_url:
+                continue
+            playwright_browser = browser.playwright_browser
+            if playwright_browser is not None and playwright_browser.is_connected():
+                return playwright_browser
+        return None
+
+    @classmethod
+    async def start_probe_browser(cls) -> None:
+        """Launch the dedicated probe browser ahead of the first health check (used by the warm-up)"""
+        await cls._get_dedicated_browser()
+
+    @classmethod
+    async def _get_dedicated_browser(cls):
+        if cls._dedicated_browser is None or not cls._dedicated_browser.is_connected():
+            from playwright.async_api import async_playwright
+
+            if cls._playwright is None:
+                cls._playwright = await async_playwright().start()
+            cls._dedicated_browser = await cls._playwright.chromium.launch(
+                headless=True,
+                args=["--disable-dev-shm-usage", "--no-sandbox", "--disable-setuid-sandbox", "--disable-gpu"]
+            )
+        return cls._dedicated_browser
+
+    @classmethod
+    async def _probe_browser(cls) -> dict:
+        started = time.monotonic()
+        try:
+            browser = cls._warm_browser()
+            source = "task"
+            if browser is None:
+                if not HEALTH_DEDICATED_BROWSER:
+                    return {"ok": None, "status": "unknown", "source": None,
+                            "detail": "no local browser running to probe"}
+                if TaskManager._task_slots.admission_paused:
+                    # Don't launch a browser while memory pressure keeps tasks from getting one
+                    return {"ok": None, "status": "unknown", "source": None,
+                            "detail": "admission paused, not launching a probe browser"}
+                browser = await asyncio.wait_for(cls._get_dedicated_browser(), timeout=HEALTH_PROBE_TIMEOUT_SECONDS * 3)
+                source = "dedicated"
+
+            # A separate context leaves the task's own pages, cookies and storage untouched
+            context = await browser.new_context()
+            try:
+                page = await context.new_page()
+                await asyncio.wait_for(page.goto("about:blank"), timeout=HEALTH_PROBE_TIMEOUT_SECONDS)
+            finally:
+                await context.close()
+            return {"ok": True, "status": "ok", "source": source,
+                    "latency_ms": round((time.monotonic() - started) * 1000, 1)}
+        except Exception as e:
+            return {"ok": False, "status": "failed", "error": str(e),
+                    "latency_ms": round((time.monotonic() - started) * 1000, 1)}
+
+    @classmethod
+    async def check_browser(cls) -> dict:
+        """Cached result of the browser probe; concurrent callers share one probe"""
+        if cls._probe_lock is None:
+            cls._probe_lock = asyncio.Lock()
+        async with cls._probe_lock:
+            if cls._probe_result is None or time.monotonic() - cls._probed_at > HEALTH_CACHE_SECONDS:
+                cls._probe_result = await cls._probe_browser()
+                cls._probed_at = time.monotonic()
+                cls._probe_result["checked_at"] = datetime.now(timezone.utc).isoformat()
+        return cls._probe_result
+
+    @classmethod
+    def capacity(cls) -> dict:
+        """Free task slots, queue depth and how many browsers are in use"""
+        slots = TaskManager._task_slots
+        active_browsers = sum(
+            1 for _, status in TaskManager._running_agents.values()
+            if status in [TaskStatus.RUNNING, TaskStatus.PAUSED]
+        )
+        return {
+            "slots_total": slots.limit,
+            "slots_in_use": slots.in_use,
+            "slots_free": max(slots.limit - slots.in_use, 0),
+            "queue_depth": slots.queued,
+            "admission_paused": slots.admission_paused,
+            "browsers_active": active_browsers,
+            "pool_occupancy": round(slots.in_use / slots.limit, 3) if slots.limit else None
+        }
+
+    @classmethod
+    async def readiness(cls) -> dict:
+        """
+        Full readiness report. The service is ready while it is admitting new tasks and can
+        get a browser: the probed local browser works, or Anchor is configured and its circuit
+        is not open. An unknown probe result (nothing to probe) does not count as working.
+        """
+        browser = await cls.check_browser()
+        anchor = AnchorCircuit.snapshot()
+        capacity = cls.capacity()
+        can_get_browser = browser["ok"] is True or (bool(ANCHOR_API_KEY) and anchor["state"] != "open")
+        ready = can_get_browser and not capacity["admission_paused"]
+        return {
+            "status": "ready" if ready else "not_ready",
+            "browser": browser,
+            "anchor_circuit": anchor,
+            "capacity": capacity
+        }
+
+    @classmethod
+    async def close(cls) -> None:
+        """Close the dedicated probe browser, if one was launched"""
+        if cls._dedicated_browser is not None:
+            await cls._dedicated_browser.close()
+            cls._dedicated_browser = None
+        if cls._playwright is not None:
+            await cls._playwright.stop()
+            cls._playwright = None
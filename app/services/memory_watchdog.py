@@ -0,0 +1,156 @@
+import asyncio
+import logging
+import os
+from datetime import datetime, timezone
+from typing import Optional
+
+from dotenv import load_dotenv
+
+from app.services.health import HealthMonitor
+from app.services.task_manager import TaskManager, TaskStatus, load_browser_agent
+
+# Load environment variables
+load_dotenv()
+
+MEMORY_WATCHDOG_INTERVAL = float(os.getenv("MEMORY_WATCHDOG_INTERVAL", "10"))
+# A local browser using more than this is recycled before its next step
+BROWSER_RSS_LIMIT_MB = float(os.getenv("BROWSER_RSS_LIMIT_MB", "1024"))
+# Fractions of the container memory limit at which task admission pauses and resumes again
+MEMORY_PAUSE_ADMISSION_RATIO = float(os.getenv("MEMORY_PAUSE_ADMISSION_RATIO", "0.85"))
+MEMORY_RESUME_ADMISSION_RATIO = float(os.getenv("MEMORY_RESUME_ADMISSION_RATIO", "0.75"))
+
+
+def _read_rss(pid: int) -> Optional[int]:
+    """Resident set size of a process in bytes, from /proc (Linux only)"""
+    try:
+        with open(f"/proc/{pid}/status", "r") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError):
+        pass
+    return None
+
+
+def _read_int(path: str) -> Optional[int]:
+    try:
+        with open(path, "r") as f:
+            value = f.read().strip()
+    except OSError:
+        return None
+    return int(value) if value.isdigit() else None  # cgroup v2 reports "max" when unlimited
+
+
+def _container_memory() -> tuple[Optional[int], Optional[int]]:
+    """Memory usage and limit of the container's cgroup in bytes (v2, then v1)"""
+    usage = _read_int("/sys/fs/cgroup/memory.current")
+    if usage is not None:
+        return usage, _read_int("/sys/fs/cgroup/memory.max")
+
+    usage = _read_int("/sys/fs/cgroup/memory/memory.usage_in_bytes")
+    limit = _read_int("/sys/fs/cgroup/memory/memory.limit_in_bytes")
+    # cgroup v1 reports a huge number instead of "unlimited"
+    if limit is not None and limit >= 1 << 60:
+        limit = None
+    return usage, limit
+
+
+class MemoryWatchdog:
+    """
+    Background sampler of API process, container and per-task browser memory.
+
+    Local browsers above BROWSER_RSS_LIMIT_MB are recycled between steps, and task
+    admission is paused while the container is close to its memory limit. Since tasks
+    only create a browser once admitted, a pause stops new browsers from being launched.
+    """
+
+    _loop_task: Optional[asyncio.Task] = None
+    _recycling: set = set()
+    _last_sample: dict = {}
+
+    @classmethod
+    def start(cls) -> None:
+        if cls._loop_task is None or cls._loop_task.done():
+            cls._loop_task = asyncio.create_task(cls._run())
+
+    @classmethod
+    async def stop(cls) -> None:
+        if cls._loop_task is not None:
+            cls._loop_task.cancel()
+            try:
+                await cls._loop_task
+            except asyncio.CancelledError:
+                pass
+            cls._loop_task = None
+
+    @classmethod
+    async def _run(cls) -> None:
+        while True:
+            try:
+                await cls.sample()
+            except Exception as e:
+                logging.warning(f"Memory watchdog sample failed: {e}")
+            await asyncio.sleep(MEMORY_WATCHDOG_INTERVAL)
+
+    @classmethod
+    async def sample(cls) -> dict:
+        """Take one sample, recycle bloated browsers and adjust task admission"""
+        usage, limit = _container_memory()
+        for task_id, (agent, status) in list(TaskManager._running_agents.items()):
+            if status not in [TaskStatus.RUNNING, TaskStatus.PAUSED]:
+                TaskManager._memory_gauges.pop(task_id, None)
+                continue
+            try:
+                await cls._sample_task(task_id, agent, status)
+            except Exception as e:
+                # The browser may be closing or not launched yet
+                logging.debug(f"Could not sample memory of task {task_id}: {e}")
+
+        slots = TaskManager._task_slots
+        if usage is not None and limit:
+            ratio = usage / limit
+            if ratio >= MEMORY_PAUSE_ADMISSION_RATIO and not slots.admission_paused:
+                logging.warning(f"Container memory at {ratio:.0%} of its limit, pausing task admission")
+                slots.pause_admission()
+                # Queued and resumed tasks only create their browser once admitted; the health
+                # probe's own browser is released too
+                await HealthMonitor.close()
+            elif ratio <= MEMORY_RESUME_ADMISSION_RATIO and slots.admission_paused:
+                logging.info(f"Container memory back to {ratio:.0%} of its limit, resuming task admission")
+                slots.resume_admission()
+
+        cls._last_sample = {
+            "process_rss_bytes": _read_rss(os.getpid()),
+            "container_usage_bytes": usage,
+            "container_limit_bytes": limit,
+            "admission_paused": slots.admission_paused,
+            "sampled_at": datetime.now(timezone.utc).isoformat()
+        }
+        return cls._last_sample
+
+    @classmethod
+    async def _sample_task(cls, task_id, agent, status: TaskStatus) -> None:
+        browser_agent = await load_browser_agent()
+        pids = await browser_agent.get_browser_pids(agent.browser)
+        rss = [_read_rss(pid) for pid in pids]
+        browser_rss = sum(value for value in rss if value)
+        TaskManager._memory_gauges[task_id] = {
+            "browser_rss_bytes": browser_rss if pids else None,
+            "browser_processes": len(pids),
+            "sampled_at": datetime.now(timezone.utc).isoformat()
+        }
+
+        if (status == TaskStatus.RUNNING and browser_rss > BROWSER_RSS_LIMIT_MB * 1024 * 1024
+                and task_id not in cls._recycling):
+            logging.warning(f"Browser of task {task_id} uses {browser_rss // (1024 * 1024)} MB, recycling it")
+            cls._recycling.add(task_id)
+            recycle = asyncio.create_task(TaskManager.recycle_browser(task_id))
+            recycle.add_done_callback(lambda _: cls._recycling.discard(task_id))
+
+    @classmethod
+    def get_report(cls) -> dict:
+        """Latest process/container sample plus the memory gauge of every active task"""
+        return {
+            **cls._last_sample,
+            "tasks": {str(task_id): gauge for task_id, gauge in TaskManager._memory_gauges.items()}
+        }
@@ -0,0 +1,116 @@
+import json
+import os
+import re
+import tempfile
+import threading
+from typing import Dict, List, Optional
+
+from cryptography.fernet import Fernet
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+# Directory where encrypted browser profiles are persisted
+PROFILE_DIR = os.getenv("BROWSER_PROFILE_DIR", "data/profiles")
+# Fernet key used to encrypt profiles at rest (generate with Fernet.generate_key())
+PROFILE_KEY = os.getenv("BROWSER_PROFILE_KEY")
+
+_PROFILE_NAME = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+
+
+class ProfileStore:
+    """
+    Encrypted on-disk store for named browser profiles.
+
+    A profile is a Playwright storage state (cookies and localStorage per origin),
+    captured when a task ends and injected into the browser of later tasks that
+    reference the same profile name.
+    """
+
+    _base_dir: str = PROFILE_DIR
+    _key: Optional[str] = PROFILE_KEY
+    _locks: Dict[str, threading.Lock] = {}
+    _locks_guard = threading.Lock()
+
+    @classmethod
+    def _fernet(cls) -> Fernet:
+        if not cls._key:
+            raise ValueError("BROWSER_PROFILE_KEY must be set to use browser profiles")
+        return Fernet(cls._key)
+
+    @classmethod
+    def _lock_for(cls, name: str) -> threading.Lock:
+        """Lock serializing saves of one profile (saves run in worker threads)"""
+        with cls._locks_guard:
+            return cls._locks.setdefault(name, threading.Lock())
+
+    @classmethod
+    def _path(cls, name: str) -> str:
+        if not _PROFILE_NAME.match(name):
+            raise ValueError(f"Invalid profile name: {name!r}. Use letters, digits, '-' or '_' (max 64).")
+        return os.path.join(cls._base_dir, f"{name}.profile")
+
+    @classmethod
+    def save(cls, name: str, storage_state: dict) -> None:
+        """
+        Encrypt and store a storage state under the given profile name.
+
+        Args:
+            name (str): The profile name
+            storage_state (dict): Playwright storage state with "cookies" and "origins"
+        """
+        path = cls._path(name)
+        token = cls._fernet().encrypt(json.dumps(storage_state).encode("utf-8"))
+        os.makedirs(cls._base_dir, exist_ok=True)
+        with cls._lock_for(name):
+            # A unique temp file per writer, so concurrent saves never share or tear one
+            fd, tmp_path = tempfile.mkstemp(dir=cls._base_dir, prefix=f"{name}.", suffix=".tmp")
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    f.write(token)
+                os.replace(tmp_path, path)
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
+
+    @classmethod
+    def load(cls, name: str) -> Optional[dict]:
+        """
+        Load and decrypt a profile.
+
+        Returns:
+            dict: The stored storage state, or None if the profile does not exist yet
+
+        Raises:
+            ValueError: If the name is invalid or no encryption key is configured
+        """
+        path = cls._path(name)
+        # Check the key even for a new profile, or it could never be saved at the end of the task
+        fernet = cls._fernet()
+        if not os.path.exists(path):
+            return None
+        with open(path, "rb") as f:
+            token = f.read()
+        return json.loads(fernet.decrypt(token))
+
+    @classmethod
+    def list_profiles(cls) -> List[str]:
+        """Names of all stored profiles"""
+        if not os.path.isdir(cls._base_dir):
+            return []
+        return sorted(name[:-len(".profile")] for name in os.listdir(cls._base_dir) if name.endswith(".profile"))
+
+    @classmethod
+    def delete(cls, name: str) -> bool:
+        """
+        Delete a profile.
+
+        Returns:
+            bool: True if the profile existed and was removed
+        """
+        path = cls._path(name)
+        if not os.path.exists(path):
+            return False
+        os.remove(path)
+        return True
@@ -1,14 +1,50 @@
 import asyncio
+import importlib
+import json
 import logging
+import os
+import time
 import uuid
-from typing import Dict, Optional
+from datetime import datetime, timezone
+from typing import TYPE_CHECKING, Dict, List, Optional
 
-from browser_use.agent.service import Agent
-from app.services.browser.browser_agent import create_browser_agent
+from cryptography.fernet import InvalidToken
+
+from app.logging_config import task_id_var
+from app.services.checkpoint_store import CheckpointStore
+from app.services.profile_store import ProfileStore
+from app.services.task_slots import TaskSlots
+from app.services.webhook_dispatcher import WebhookDispatcher
+
+if TYPE_CHECKING:
+    from browser_use.agent.service import Agent
+
+# Seconds between checkpoints of a running task
+CHECKPOINT_INTERVAL = float(os.getenv("TASK_CHECKPOINT_INTERVAL", "5"))
+# Maximum number of agents running at once, across regular tasks and fan-out sub-tasks
+MAX_CONCURRENT_TASKS = int(os.getenv("MAX_CONCURRENT_TASKS", "5"))
 
 
 from enum import Enum
 
+
+_browser_agent_module = None
+
+
+async def load_browser_agent():
+    """
+    The browser agent module, imported on first use: it pulls in browser_use, langchain
+    and playwright, which would otherwise delay the API's startup.
+
+    The import runs in a worker thread, so the event loop keeps serving while it (or the
+    warm-up's import of the same module) is in progress.
+    """
+    global _browser_agent_module
+    if _browser_agent_module is None:
+        _browser_agent_module = await asyncio.to_thread(importlib.import_module, "app.services.browser.browser_agent")
+    return _browser_agent_module
+
+
 class TaskStatus(Enum):
     CREATED = "created"    # Task is initialized but not yet started
     RUNNING = "running"    # Task is currently executing
@@ -16,64 +52,693 @@ class TaskStatus(Enum):
     STOPPED = "stopped"    # Task was manually stopped
     PAUSED = "paused"      # Task execution is temporarily paused
     FAILED = "failed"      # Task encountered an error and could not complete
+    TIMED_OUT = "timed_out"  # Task exceeded its deadline or step budget
+
+TERMINAL_STATUSES = [TaskStatus.STOPPED, TaskStatus.FINISHED, TaskStatus.FAILED, TaskStatus.TIMED_OUT]
 
 class TaskManager:
-    _running_agents: Dict[uuid.UUID, tuple[Agent, TaskStatus]] = {}
+    _running_agents: Dict[uuid.UUID, tuple["Agent", TaskStatus]] = {}
     _running_tasks: Dict[uuid.UUID, asyncio.Task] = {}  # Fixed name (was _running_task in your code)
     _live_urls: Dict[uuid.UUID, str] = {}
+    _task_meta: Dict[uuid.UUID, dict] = {}  # Original request parameters, needed to resume a task
+    _browser_data: Dict[uuid.UUID, dict] = {}  # Last captured URL and storage state per task
+    _fanout_tasks: Dict[uuid.UUID, dict] = {}  # Parent tasks of fan-outs: request, children and status
+    _memory_gauges: Dict[uuid.UUID, dict] = {}  # Latest browser memory sample per task, see MemoryWatchdog
+    _agent_waiters: Dict[uuid.UUID, asyncio.Future] = {}  # create_task calls waiting for a just admitted task's agent
+    _task_slots = TaskSlots(MAX_CONCURRENT_TASKS)  # Global concurrency limit, earliest deadline admitted first
 
 
     @classmethod
-    async def create_task(cls, task: str, model_provider: str = "openai_chat", model_name: str = "gpt-4o") -> tuple[
+    async def create_task(cls, task: str, model_provider: str = "openai_chat", model_name: str = "gpt-4o",
+                          browser_profile: Optional[str] = None, callback_url: Optional[str] = None,
+                          deadline_seconds: Optional[float] = None, max_steps: Optional[int] = None) -> tuple[
         uuid.UUID, str]:
         """
         Create a new task and return its ID and live URL for monitoring.
 
+        Args:
+            browser_profile (str, optional): Named profile whose cookies and localStorage are
+                loaded into the browser, and updated with the browser's state when the task ends
+            callback_url (str, optional): URL that receives a POST with the final output
+                once the task reaches a terminal status
+            deadline_seconds (float, optional): Wall-clock budget from creation, including time
+                spent queued. The task is TIMED_OUT when it runs out.
+            max_steps (int, optional): Step budget; the task is TIMED_OUT if it uses every step
+                without completing
+
         Returns:
-            tuple: (task_id, live_url) where live_url may be None if not available
+            tuple: (task_id, live_url). The browser is only created once the task gets a task
+                slot: if one is free, this waits for the browser and returns its live URL.
+                For a queued task live_url is None; it appears in the task details later.
         """
         task_id = uuid.uuid4()
+        created_at = datetime.now(timezone.utc)
+        # Fail now rather than once the task is admitted
+        await cls._check_browser_profile(browser_profile)
+
+        cls._task_meta[task_id] = {
+            "task": task,
+            "model_provider": model_provider,
+            "model_name": model_name,
+            "browser_profile": browser_profile,
+            "callback_url": callback_url,
+            "deadline_at": cls._deadline_at(created_at, deadline_seconds),
+            "max_steps": max_steps,
+            "created_at": created_at.isoformat()
+        }
+        # Checkpoint right away, so a task still queued at a crash or redeploy is not lost
+        try:
+            await cls._save_queued_checkpoint(task_id)
+        except Exception as e:
+            logging.warning(f"Failed to checkpoint task {task_id}: {e}")
+        # With a free slot the task is admitted at once: wait for its browser to return the live URL
+        waiter = None
+        if cls._task_slots.has_free_slot:
+            waiter = asyncio.get_running_loop().create_future()
+            cls._agent_waiters[task_id] = waiter
+        cls._start_agent_task(task_id, task=task, model_provider=model_provider, model_name=model_name,
+                              browser_profile=browser_profile)
+        if waiter is None:
+            return task_id, None
 
-        # Create the browser agent and get the live URL
-        agent, live_url = await create_browser_agent(
-            task=task,
-            model_provider=model_provider,
-            model_name=model_name
-        )
+        try:
+            live_url = await asyncio.wait_for(asyncio.shield(waiter), timeout=cls._remaining(cls._deadline(task_id)))
+        except asyncio.TimeoutError:
+            cls._agent_waiters.pop(task_id, None)
+            return task_id, None
+        return task_id, live_url
 
-        # Store the agent and its status
-        cls._running_agents[task_id] = (agent, TaskStatus.CREATED)
+    @classmethod
+    def _notify_agent_waiter(cls, task_id: uuid.UUID, live_url: Optional[str] = None,
+                             error: Optional[Exception] = None) -> None:
+        """Hand create_task the live URL of a task it is waiting for, or the agent creation error"""
+        waiter = cls._agent_waiters.pop(task_id, None)
+        if waiter is None or waiter.done():
+            return
+        if error is not None:
+            waiter.set_exception(error)
+        else:
+            waiter.set_result(live_url)
 
-        # Store the live URL if available
-        if live_url:
-            cls._live_urls[task_id] = live_url
+    @staticmethod
+    async def _check_browser_profile(browser_profile: Optional[str]) -> None:
+        """Raise ValueError if the profile name is invalid or profiles cannot be decrypted"""
+        if browser_profile:
+            try:
+                await asyncio.to_thread(ProfileStore.load, browser_profile)
+            except InvalidToken:
+                raise ValueError(f"Browser profile {browser_profile!r} cannot be decrypted with the configured key")
+
+    @classmethod
+    def _start_agent_task(cls, task_id: uuid.UUID, status: TaskStatus = TaskStatus.CREATED,
+                          history_path: Optional[str] = None, **agent_kwargs) -> None:
+        """
+        Register a task and start it in the background. Its agent and browser are only
+        created once it gets a task slot; until then the task has no agent.
+
+        Args:
+            status (TaskStatus): Initial status, PAUSED for a paused task being resumed
+            history_path (str, optional): Checkpointed history to restore into the agent
+            **agent_kwargs: Arguments for create_browser_agent
+        """
+        cls._running_agents[task_id] = (None, status)
 
-        # Create a task but DO NOT await it
-        task_obj = asyncio.create_task(cls._run_agent_task(agent, task_id))
+        # Create a task but DO NOT await it - it stays queued until a task slot is free
+        task_obj = asyncio.create_task(cls._run_agent_task(task_id, history_path, agent_kwargs))
         cls._running_tasks[task_id] = task_obj
 
-        # Update status to RUNNING
-        cls._running_agents[task_id] = (agent, TaskStatus.RUNNING)
+    @staticmethod
+    def _deadline_at(created_at: datetime, deadline_seconds: Optional[float]) -> Optional[str]:
+        if deadline_seconds is None:
+            return None
+        return datetime.fromtimestamp(created_at.timestamp() + deadline_seconds, timezone.utc).isoformat()
 
-        # Return both the task ID and the live URL
-        return task_id, live_url
+    @staticmethod
+    def _remaining(deadline: Optional[float]) -> Optional[float]:
+        """Seconds left until a deadline, as a timeout for asyncio.wait_for"""
+        return max(deadline - time.time(), 0) if deadline is not None else None
+
+    @classmethod
+    def _deadline(cls, task_id: uuid.UUID) -> Optional[float]:
+        """The task's deadline as epoch seconds, or None if it has none"""
+        deadline_at = cls._task_meta.get(task_id, {}).get("deadline_at")
+        return datetime.fromisoformat(deadline_at).timestamp() if deadline_at else None
+
+    @classmethod
+    def _set_status(cls, task_id: uuid.UUID, status: TaskStatus) -> None:
+        if task_id in cls._running_agents:
+            agent, _ = cls._running_agents[task_id]
+            cls._running_agents[task_id] = (agent, status)
 
     @classmethod
-    async def _run_agent_task(cls, agent, task_id):
+    async def _run_agent_task(cls, task_id: uuid.UUID, history_path: Optional[str], agent_kwargs: dict):
+        """Wait for a free task slot, then create and run the agent"""
+        # Log records from this asyncio task and the ones it spawns carry the task_id
+        task_id_var.set(str(task_id))
+        deadline = cls._deadline(task_id)
+        try:
+            await asyncio.wait_for(cls._task_slots.acquire(deadline), timeout=cls._remaining(deadline))
+        except asyncio.TimeoutError:
+            logging.warning(f"Task {task_id} exceeded its deadline while queued")
+            cls._set_status(task_id, TaskStatus.TIMED_OUT)
+            await cls._finish_task(task_id, None)
+            return
+        except asyncio.CancelledError:
+            # Stopped while still queued
+            await cls._finish_task(task_id, None)
+            raise
+        try:
+            _, status = cls._running_agents[task_id]
+            if status in TERMINAL_STATUSES:
+                # Stopped just as it was admitted
+                await cls._finish_task(task_id, None)
+                return
+            try:
+                agent = await cls._create_task_agent(task_id, history_path, agent_kwargs)
+            except asyncio.CancelledError:
+                await cls._finish_task(task_id, None)
+                raise
+            except Exception as e:
+                logging.error(f"Error creating agent for task {task_id}: {e}")
+                cls._set_status(task_id, TaskStatus.FAILED)
+                cls._notify_agent_waiter(task_id, error=e)
+                await cls._finish_task(task_id, None)
+                return
+            cls._notify_agent_waiter(task_id, live_url=cls._live_urls.get(task_id))
+            await cls._run_admitted_agent(agent, task_id)
+        finally:
+            cls._task_slots.release()
+
+    @classmethod
+    async def _create_task_agent(cls, task_id: uuid.UUID, history_path: Optional[str], agent_kwargs: dict) -> "Agent":
+        """Create an admitted task's browser agent and attach it to the task"""
+        browser_agent = await load_browser_agent()
+        agent, live_url = await browser_agent.create_browser_agent(**agent_kwargs)
+
+        # Restore the completed steps so numbering, details and final output stay continuous
+        if history_path:
+            from browser_use.agent.views import AgentHistoryList
+            try:
+                agent.state.history = AgentHistoryList.load_from_file(history_path, agent.AgentOutput)
+            except BaseException:
+                # Don't leak the browser (possibly a billed Anchor session) of a task that can't resume
+                await browser_agent.close_browser_agent(agent)
+                raise
+            agent.state.n_steps = len(agent.state.history.history) + 1
+
+        if live_url:
+            cls._live_urls[task_id] = live_url
+        _, status = cls._running_agents[task_id]
+        if status == TaskStatus.PAUSED:
+            agent.pause()
+        cls._running_agents[task_id] = (agent, status)
+        return agent
+
+    @classmethod
+    async def _run_admitted_agent(cls, agent, task_id):
         """Run the agent and manage task status transitions"""
+        _, status = cls._running_agents[task_id]
+        if status == TaskStatus.CREATED:
+            cls._running_agents[task_id] = (agent, TaskStatus.RUNNING)
+
+        deadline = cls._deadline(task_id)
+        max_steps = cls._task_meta.get(task_id, {}).get("max_steps")
+
+        # Fan-out sub-tasks are not checkpointed: their parent lives only in memory,
+        # so a resumed sub-task would have nothing to report back to
+        checkpointer = None
+        if not cls._task_meta.get(task_id, {}).get("parent_id"):
+            checkpointer = asyncio.create_task(cls._checkpoint_loop(agent, task_id))
         try:
-            # Status should already be RUNNING when this starts
-            await agent.run()
-            # Update to FINISHED on successful completion
-            if task_id in cls._running_agents:
-                agent, _ = cls._running_agents[task_id]
-                cls._running_agents[task_id] = (agent, TaskStatus.FINISHED)
+            if deadline is not None and deadline <= time.time():
+                raise asyncio.TimeoutError("Deadline passed before the task started")
+
+            run_kwargs = {}
+            if max_steps:
+                # Steps completed before a resume count against the budget
+                run_kwargs["max_steps"] = max(max_steps - len(agent.state.history.history), 0)
+            timeout = deadline - time.time() if deadline is not None else None
+            await asyncio.wait_for(agent.run(**run_kwargs), timeout=timeout)
+
+            # On its last allowed step the agent is forced to call "done", so a used-up budget
+            # shows as a done but unsuccessful history rather than an unfinished one
+            history = agent.state.history
+            if max_steps and len(history.history) >= max_steps and not history.is_successful():
+                logging.warning(f"Task {task_id} used its budget of {max_steps} steps without completing")
+                cls._set_status(task_id, TaskStatus.TIMED_OUT)
+            else:
+                # Update to FINISHED on successful completion
+                cls._set_status(task_id, TaskStatus.FINISHED)
+        except asyncio.TimeoutError as e:
+            if deadline is not None and deadline <= time.time():
+                logging.warning(f"Task {task_id} exceeded its deadline")
+                cls._set_status(task_id, TaskStatus.TIMED_OUT)
+            else:
+                cls._set_status(task_id, TaskStatus.FAILED)
+                logging.error(f"Error in agent task {task_id}: {e}")
         except Exception as e:
             # Update to FAILED on error
             if task_id in cls._running_agents:
                 agent, _ = cls._running_agents[task_id]
                 cls._running_agents[task_id] = (agent, TaskStatus.FAILED)
             logging.error(f"Error in agent task {task_id}: {e}")
+        finally:
+            if checkpointer is not None:
+                checkpointer.cancel()
+            await cls._finish_task(task_id, agent)
+
+    @classmethod
+    async def _finish_task(cls, task_id: uuid.UUID, agent) -> None:
+        """
+        Drop the task's checkpoint unless it was interrupted, send its completion callback
+        and release its browser.
+
+        The bookkeeping runs before the browser teardown, and the teardown is shielded, so a
+        task cancelled again while closing its browser (e.g. by stop_task) still completes both.
+        """
+        cls._memory_gauges.pop(task_id, None)
+        # A task that ends without an agent (stopped or timed out) has no live URL to wait for
+        cls._notify_agent_waiter(task_id)
+        # Keep the checkpoint only if the task was interrupted (e.g. by a shutdown)
+        _, status = cls._running_agents.get(task_id, (None, TaskStatus.FAILED))
+        if status in TERMINAL_STATUSES:
+            meta = cls._task_meta.setdefault(task_id, {})
+            meta["finished_at"] = datetime.now(timezone.utc).isoformat()
+            CheckpointStore.delete(task_id)
+            if meta.get("callback_url") and task_id in cls._running_agents:
+                WebhookDispatcher.enqueue(meta["callback_url"], await cls._completion_payload(task_id))
+
+        if agent is not None:
+            await asyncio.shield(cls._teardown_browser(task_id, agent))
+
+    @classmethod
+    async def _completion_payload(cls, task_id: uuid.UUID) -> dict:
+        """Body of the completion callback: final status, output and a summary of the steps"""
+        details = await cls.get_task_details(task_id)
+        payload = {key: details.get(key) for key in ["id", "parent_id", "task", "status", "output",
+                                                     "created_at", "finished_at"]}
+        if "children" in details:
+            payload["children"] = details["children"]
+        else:
+            payload["steps"] = details["steps"]
+        return payload
+
+    @classmethod
+    async def _teardown_browser(cls, task_id: uuid.UUID, agent) -> None:
+        """Capture the final browser state, update the task's profile and close the browser"""
+        browser_agent = await load_browser_agent()
+        try:
+            browser_state = await browser_agent.capture_browser_state(agent.browser_context)
+            if browser_state:
+                cls._browser_data[task_id] = browser_state
+                meta = cls._task_meta.get(task_id, {})
+                profile = meta.get("browser_profile")
+                # Fan-out sub-tasks share a profile; their parent saves it once, see _save_fanout_profile
+                if profile and not meta.get("parent_id"):
+                    await asyncio.to_thread(ProfileStore.save, profile, browser_state["storage_state"])
+                    logging.info(f"Saved browser profile {profile} from task {task_id}")
+        except Exception as e:
+            logging.warning(f"Failed to capture browser state for task {task_id}: {e}")
+        finally:
+            try:
+                await browser_agent.close_browser_agent(agent)
+            except Exception as e:
+                logging.warning(f"Failed to close browser for task {task_id}: {e}")
+
+    @classmethod
+    async def recycle_browser(cls, task_id: uuid.UUID) -> bool:
+        """
+        Replace a running task's browser with a fresh one between two steps, to reclaim leaked memory.
+
+        Returns:
+            bool: True if the browser was replaced
+        """
+        agent, status = cls._running_agents.get(task_id, (None, None))
+        if status != TaskStatus.RUNNING:
+            return False
+
+        # Waits for the current step to finish; the next step waits for the swap
+        try:
+            browser_agent = await load_browser_agent()
+            recycled = await browser_agent.recycle_agent_browser(agent)
+            if recycled:
+                logging.info(f"Recycled browser of task {task_id}")
+            return recycled
+        except Exception as e:
+            logging.error(f"Failed to recycle browser of task {task_id}: {e}")
+            return False
+
+    @classmethod
+    async def _checkpoint_loop(cls, agent, task_id: uuid.UUID) -> None:
+        """Checkpoint a task as soon as it is admitted, then whenever it has completed new steps"""
+        last_checkpointed = None
+        while True:
+            completed_steps = len(agent.state.history.history)
+            if completed_steps != last_checkpointed:
+                try:
+                    await cls._save_checkpoint(task_id, agent)
+                    last_checkpointed = completed_steps
+                except Exception as e:
+                    logging.warning(f"Failed to checkpoint task {task_id}: {e}")
+            await asyncio.sleep(CHECKPOINT_INTERVAL)
+
+    @classmethod
+    async def _save_queued_checkpoint(cls, task_id: uuid.UUID) -> None:
+        """Persist a task that has no agent yet; it is resumed from scratch after a restart"""
+        state = {
+            **cls._task_meta[task_id],
+            "id": str(task_id),
+            "status": TaskStatus.CREATED.value,
+            "completed_steps": 0,
+            "url": None,
+            "storage_state": None,
+            "updated_at": datetime.now(timezone.utc).isoformat()
+        }
+        await asyncio.to_thread(CheckpointStore.save, task_id, state)
+
+    @classmethod
+    async def _save_checkpoint(cls, task_id: uuid.UUID, agent) -> None:
+        """Persist the task's history, current URL and browser storage state"""
+        _, status = cls._running_agents[task_id]
+        browser_agent = await load_browser_agent()
+        browser_state = await browser_agent.capture_browser_state(agent.browser_context)
+        if browser_state:
+            cls._browser_data[task_id] = browser_state
+        else:
+            # No page open yet (e.g. just admitted): keep the last known URL and storage state
+            browser_state = cls._browser_data.get(task_id, {})
+
+        # Snapshot the history so the agent can keep appending while we write
+        history = agent.state.history.model_copy(update={"history": list(agent.state.history.history)})
+
+        state = {
+            **cls._task_meta[task_id],
+            "id": str(task_id),
+            "status": status.value,
+            "completed_steps": len(history.history),
+            "url": browser_state.get("url"),
+            "storage_state": browser_state.get("storage_state"),
+            "updated_at": datetime.now(timezone.utc).isoformat()
+        }
+        await asyncio.to_thread(CheckpointStore.save, task_id, state, history)
+        if cls._task_meta[task_id].get("finished_at"):
+            # The task ended while this checkpoint was being written
+            CheckpointStore.delete(task_id)
+
+    @classmethod
+    async def resume_interrupted_tasks(cls) -> None:
+        """
+        Resume every checkpointed task that was interrupted by a crash or redeploy.
+        """
+        resumable = [TaskStatus.CREATED.value, TaskStatus.RUNNING.value, TaskStatus.PAUSED.value]
+        for state in CheckpointStore.list_checkpoints():
+            task_id = uuid.UUID(state["id"])
+            if task_id in cls._running_agents:
+                continue
+            if state.get("status") not in resumable or state.get("parent_id"):
+                CheckpointStore.delete(task_id)
+                continue
+            try:
+                await cls._resume_from_checkpoint(task_id, state)
+                logging.info(f"Resumed task {task_id} from step {state.get('completed_steps', 0) + 1}")
+            except Exception as e:
+                logging.error(f"Failed to resume task {task_id}: {e}")
+
+    @classmethod
+    async def _resume_from_checkpoint(cls, task_id: uuid.UUID, state: dict) -> None:
+        """Re-queue a checkpointed task; its agent is recreated once it gets a task slot"""
+        history_path = CheckpointStore.history_path(task_id)
+        has_history = os.path.exists(history_path)
+
+        url = state.get("url")
+        initial_actions = [{"go_to_url": {"url": url}}] if url and url.startswith("http") else None
+        if url or state.get("storage_state"):
+            cls._browser_data[task_id] = {"url": url, "storage_state": state.get("storage_state")}
+
+        cls._task_meta[task_id] = {
+            "task": state["task"],
+            "model_provider": state["model_provider"],
+            "model_name": state["model_name"],
+            "browser_profile": state.get("browser_profile"),
+            "callback_url": state.get("callback_url"),
+            "deadline_at": state.get("deadline_at"),
+            "max_steps": state.get("max_steps"),
+            "created_at": state.get("created_at")
+        }
+        paused = state.get("status") == TaskStatus.PAUSED.value
+        cls._start_agent_task(
+            task_id,
+            status=TaskStatus.PAUSED if paused else TaskStatus.CREATED,
+            history_path=history_path if has_history else None,
+            task=state["task"],
+            model_provider=state["model_provider"],
+            model_name=state["model_name"],
+            initial_actions=initial_actions,
+            message_context=cls._resume_context(history_path) if has_history else None,
+            storage_state=state.get("storage_state"),
+            browser_profile=state.get("browser_profile")
+        )
+
+    @staticmethod
+    def _resume_context(history_path: str) -> Optional[str]:
+        """Summarize already completed steps so the LLM continues instead of starting over"""
+        with open(history_path, "r", encoding="utf-8") as f:
+            history = json.load(f)["history"]
+
+        lines = []
+        for i, item in enumerate(history):
+            model_output = item.get("model_output") or {}
+            goal = (model_output.get("current_state") or {}).get("next_goal")
+            extracted = [r["extracted_content"] for r in item.get("result", []) if r.get("extracted_content")]
+            line = f"{i + 1}. {goal or 'No goal recorded'}"
+            if extracted:
+                line += f" -> {'; '.join(extracted)}"
+            lines.append(line)
+
+        if not lines:
+            return None
+        return (
+            "This task was interrupted and is being resumed. "
+            "These steps were already completed, do not repeat them:\n" + "\n".join(lines)
+        )
+
+    @classmethod
+    async def create_fanout_task(cls, task: str, items: List[str], model_provider: str = "openai_chat",
+                                 model_name: str = "gpt-4o", browser_profile: Optional[str] = None,
+                                 callback_url: Optional[str] = None, deadline_seconds: Optional[float] = None,
+                                 max_steps: Optional[int] = None) -> tuple[uuid.UUID, List[uuid.UUID]]:
+        """
+        Split a task into one sub-task per item and run them concurrently as separate agents.
+
+        The task acts as a template: "{item}" is replaced by each item, otherwise the item is
+        appended as the sub-task's input. Sub-agents share the global concurrency limit and only
+        acquire a browser once they get a task slot. A callback_url is notified once, when the
+        parent task completes. The deadline applies to the whole fan-out, max_steps to each sub-task.
+        All sub-tasks start from the browser_profile; it is updated once, from the first sub-task
+        (in item order) that finished.
+
+        Returns:
+            tuple: (parent_id, child_ids)
+        """
+        if not items:
+            raise ValueError("A fan-out task needs at least one item")
+        # Fail before any sub-task is queued rather than once per sub-task
+        await cls._check_browser_profile(browser_profile)
+
+        parent_id = uuid.uuid4()
+        created_at = datetime.now(timezone.utc)
+        children = []
+        for item in items:
+            sub_task = task.replace("{item}", item) if "{item}" in task else f"{task}\n\nInput: {item}"
+            children.append({"id": uuid.uuid4(), "item": item, "task": sub_task, "error": None})
+
+        cls._fanout_tasks[parent_id] = {
+            "task": task,
+            "children": children,
+            "status": TaskStatus.RUNNING,
+            "callback_url": callback_url,
+            "browser_profile": browser_profile,
+            "deadline_at": cls._deadline_at(created_at, deadline_seconds),
+            "max_steps": max_steps,
+            "created_at": created_at.isoformat(),
+            "finished_at": None
+        }
+
+        child_tasks = []
+        for child in children:
+            # Registered while queued, so the sub-task's status, details and stop work before it has an agent
+            cls._task_meta[child["id"]] = {
+                "task": child["task"],
+                "model_provider": model_provider,
+                "model_name": model_name,
+                "browser_profile": browser_profile,
+                "parent_id": str(parent_id),
+                "deadline_at": cls._fanout_tasks[parent_id]["deadline_at"],
+                "max_steps": max_steps,
+                "created_at": created_at.isoformat()
+            }
+            cls._running_agents[child["id"]] = (None, TaskStatus.CREATED)
+            child_task = asyncio.create_task(cls._run_fanout_child(
+                parent_id, child, model_provider, model_name, browser_profile
+            ))
+            cls._running_tasks[child["id"]] = child_task
+            child_tasks.append(child_task)
+
+        cls._running_tasks[parent_id] = asyncio.create_task(cls._run_fanout_task(parent_id, child_tasks))
+        return parent_id, [child["id"] for child in children]
+
+    @classmethod
+    async def _run_fanout_child(cls, parent_id: uuid.UUID, child: dict, model_provider: str, model_name: str,
+                                browser_profile: Optional[str]) -> None:
+        """Wait for a task slot, then create and run the sub-agent for one fan-out item"""
+        child_id = child["id"]
+        task_id_var.set(str(child_id))
+        parent = cls._fanout_tasks[parent_id]
+        deadline_at = parent["deadline_at"]
+        deadline = datetime.fromisoformat(deadline_at).timestamp() if deadline_at else None
+
+        try:
+            await asyncio.wait_for(cls._task_slots.acquire(deadline), timeout=cls._remaining(deadline))
+        except asyncio.TimeoutError:
+            cls._set_status(child_id, TaskStatus.TIMED_OUT)
+            return
+        try:
+            _, status = cls._running_agents[child_id]
+            if status in TERMINAL_STATUSES or parent["status"] == TaskStatus.STOPPED:
+                # Stopped (alone or with its parent) just as it was admitted
+                return
+            if deadline is not None and deadline <= time.time():
+                # Don't spend a browser on a sub-task that can no longer finish in time
+                cls._set_status(child_id, TaskStatus.TIMED_OUT)
+                return
+            try:
+                browser_agent = await load_browser_agent()
+                agent, live_url = await browser_agent.create_browser_agent(
+                    task=child["task"],
+                    model_provider=model_provider,
+                    model_name=model_name,
+                    browser_profile=browser_profile
+                )
+            except Exception as e:
+                child["error"] = str(e)
+                cls._set_status(child_id, TaskStatus.FAILED)
+                logging.error(f"Error creating agent for sub-task {child_id} of {parent_id}: {e}")
+                return
+
+            _, status = cls._running_agents[child_id]
+            cls._running_agents[child_id] = (agent, status)
+            if live_url:
+                cls._live_urls[child_id] = live_url
+            await cls._run_admitted_agent(agent, child_id)
+        finally:
+            cls._task_slots.release()
+
+    @classmethod
+    async def _run_fanout_task(cls, parent_id: uuid.UUID, child_tasks: List[asyncio.Task]) -> None:
+        """Wait for all sub-tasks and derive the parent status from theirs"""
+        task_id_var.set(str(parent_id))
+        await asyncio.gather(*child_tasks, return_exceptions=True)
+
+        parent = cls._fanout_tasks[parent_id]
+        parent["finished_at"] = datetime.now(timezone.utc).isoformat()
+        if parent["status"] != TaskStatus.STOPPED:
+            # The parent finishes if any sub-task produced a result; failed items are reported per child
+            statuses = [cls._child_status(child) for child in parent["children"]]
+            if TaskStatus.FINISHED in statuses:
+                parent["status"] = TaskStatus.FINISHED
+            elif TaskStatus.TIMED_OUT in statuses:
+                parent["status"] = TaskStatus.TIMED_OUT
+            else:
+                parent["status"] = TaskStatus.FAILED
+        await cls._save_fanout_profile(parent_id)
+
+        if parent["callback_url"]:
+            WebhookDispatcher.enqueue(parent["callback_url"], await cls._completion_payload(parent_id))
+
+    @classmethod
+    async def _save_fanout_profile(cls, parent_id: uuid.UUID) -> None:
+        """
+        Update a fan-out's browser profile from the browser state of its first finished
+        sub-task, in item order, instead of letting every sub-task overwrite it in turn.
+        """
+        parent = cls._fanout_tasks[parent_id]
+        profile = parent["browser_profile"]
+        if not profile:
+            return
+        for child in parent["children"]:
+            browser_state = cls._browser_data.get(child["id"])
+            if cls._child_status(child) == TaskStatus.FINISHED and browser_state:
+                try:
+                    await asyncio.to_thread(ProfileStore.save, profile, browser_state["storage_state"])
+                    logging.info(f"Saved browser profile {profile} from sub-task {child['id']} of {parent_id}")
+                except Exception as e:
+                    logging.warning(f"Failed to save browser profile {profile} of task {parent_id}: {e}")
+                return
+
+    @classmethod
+    def _child_status(cls, child: dict) -> TaskStatus:
+        """Status of a fan-out sub-task, including ones that never got an agent"""
+        _, status = cls._running_agents[child["id"]]
+        return status
+
+    @classmethod
+    async def _get_fanout_details(cls, parent_id: uuid.UUID) -> dict:
+        """Details of a fan-out parent, with its children and their merged outputs"""
+        parent = cls._fanout_tasks[parent_id]
+
+        children = []
+        for child in parent["children"]:
+            status = cls._child_status(child)
+            output = None
+            if status == TaskStatus.FINISHED:
+                agent, _ = cls._running_agents[child["id"]]
+                output = agent.state.history.final_result()
+            children.append({
+                "id": str(child["id"]),
+                "item": child["item"],
+                "status": status.value,
+                "output": output,
+                "error": child["error"],
+                "live_url": cls._live_urls.get(child["id"])
+            })
+
+        output = None
+        if parent["status"] in TERMINAL_STATUSES:
+            output = [{"item": child["item"], "status": child["status"], "output": child["output"]}
+                      for child in children]
+
+        return {
+            "id": str(parent_id),
+            "task": parent["task"],
+            "output": output,
+            "status": parent["status"].value,
+            "created_at": parent["created_at"],
+            "finished_at": parent["finished_at"],
+            "deadline_at": parent["deadline_at"],
+            "children": children,
+            "live_url": None,
+            "browser_data": None
+        }
+
+    @classmethod
+    async def _stop_fanout_task(cls, parent_id: uuid.UUID) -> bool:
+        """Stop a fan-out parent along with all of its running and queued sub-tasks"""
+        parent = cls._fanout_tasks[parent_id]
+        if parent["status"] != TaskStatus.RUNNING:
+            logging.warning(f"Cannot stop task {parent_id} - current status: {parent['status']}")
+            return False
+
+        parent["status"] = TaskStatus.STOPPED
+        active = [child["id"] for child in parent["children"] if cls._child_status(child) not in TERMINAL_STATUSES]
+        # Queued sub-tasks first, so none is admitted while the running ones are being stopped
+        queued = [child_id for child_id in active if cls._running_agents[child_id][0] is None]
+        for child_id in queued:
+            await cls.stop_task(child_id)
+        await asyncio.gather(*(cls.stop_task(child_id) for child_id in active if child_id not in queued))
+
+        logging.info(f"Fan-out task {parent_id} stopped successfully")
+        return True
+
     @classmethod
     async def stop_task(cls, task_id: uuid.UUID) -> bool:
         """
@@ -85,20 +750,24 @@ class TaskManager:
         Returns:
             bool: True if the task was successfully stopped, False otherwise
         """
+        if task_id in cls._fanout_tasks:
+            return await cls._stop_fanout_task(task_id)
         if task_id in cls._running_agents:
             # Extract agent and current status from the tuple
             agent, status = cls._running_agents[task_id]
             task = cls._running_tasks.get(task_id)
             # Only attempt to stop if not already stopped or finished
-            if status not in [TaskStatus.STOPPED, TaskStatus.FINISHED, TaskStatus.FAILED]:
-                # Call the agent's stop method
-                agent.stop()
+            if status not in TERMINAL_STATUSES:
+                # Call the agent's stop method (a queued task has no agent yet)
+                if agent is not None:
+                    agent.stop()
 
                 # Update the task status to STOPPED
                 cls._running_agents[task_id] = (agent, TaskStatus.STOPPED)
 
                 # Wait briefly for the agent to process the stop flag
-                await asyncio.sleep(0.4)
+                if agent is not None:
+                    await asyncio.sleep(0.4)
 
                 # Optionally cancel the task if it's still running
                 if task and not task.done():
@@ -131,6 +800,8 @@ class TaskManager:
         Raises:
             KeyError: If the task ID is not found
         """
+        if task_id in cls._fanout_tasks:
+            return cls._fanout_tasks[task_id]["status"].value
         if task_id in cls._running_agents:
             # The _running_agents dictionary stores tuples of (Agent, TaskStatus)
             _, status = cls._running_agents[task_id]
@@ -187,6 +858,11 @@ class TaskManager:
             agent, status = cls._running_agents[task_id]
 
             # Only resume if the task is currently paused
+            if status == TaskStatus.PAUSED and agent is None:
+                # Resumed from a paused checkpoint but not admitted yet: just queue it normally
+                cls._running_agents[task_id] = (None, TaskStatus.CREATED)
+                logging.info(f"Task {task_id} resumed successfully")
+                return True
             if status == TaskStatus.PAUSED:
                 # Call the agent's resume method
                 agent.resume()
@@ -234,6 +910,8 @@ class TaskManager:
         """
         Get comprehensive task details including live URL, steps, output and status.
         """
+        if task_id in cls._fanout_tasks:
+            return await cls._get_fanout_details(task_id)
         if task_id not in cls._running_agents:
             raise KeyError(f"Task with ID {task_id} not found")
 
@@ -243,13 +921,13 @@ class TaskManager:
         live_url = cls._live_urls.get(task_id)
 
         # Get creation timestamp
-        created_at = None
+        created_at = cls._task_meta.get(task_id, {}).get("created_at")
         # Get finished timestamp if available
-        finished_at = None
+        finished_at = cls._task_meta.get(task_id, {}).get("finished_at")
 
-        # Get steps information if available
+        # Get steps information if available (a queued task has no agent yet)
         steps = []
-        if hasattr(agent.state, "history") and agent.state.history.history:
+        if agent is not None and agent.state.history.history:
             for i, history_item in enumerate(agent.state.history.history):
                 if history_item.model_output:
                     steps.append({
@@ -261,20 +939,31 @@ class TaskManager:
 
         # Get output if task is finished
         output = None
-        if status == TaskStatus.FINISHED and agent.state.history.is_done():
+        if status == TaskStatus.FINISHED and agent is not None and agent.state.history.is_done():
             output = agent.state.history.final_result()
 
         # Get browser data if available (cookies, etc.)
         browser_data = None
-        # You would need to implement logic to extract browser data here
+        captured = cls._browser_data.get(task_id)
+        if captured:
+            storage_state = captured.get("storage_state") or {}
+            browser_data = {
+                "profile": cls._task_meta.get(task_id, {}).get("browser_profile"),
+                "url": captured.get("url"),
+                "cookies": storage_state.get("cookies", []),
+                "origins": storage_state.get("origins", [])
+            }
 
         return {
             "id": str(task_id),
-            "task": agent.task,
+            "parent_id": cls._task_meta.get(task_id, {}).get("parent_id"),
+            "task": cls._task_meta.get(task_id, {}).get("task") or agent.task,
             "output": output,
             "status": status.value,
             "created_at": created_at or "2023-11-07T05:31:56Z",  # Placeholder - implement actual timestamp
             "finished_at": finished_at,
+            "deadline_at": cls._task_meta.get(task_id, {}).get("deadline_at"),
+            "memory": cls._memory_gauges.get(task_id),
             "steps": steps,
             "live_url": live_url,
             "browser_data": browser_data
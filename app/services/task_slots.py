@@ -0,0 +1,77 @@
+import asyncio
+import heapq
+import itertools
+import math
+from typing import Optional
+
+
+class TaskSlots:
+    """
+    Concurrency limit for running agents that admits waiters earliest-deadline-first.
+
+    Waiters without a deadline are admitted after every waiter that has one, in arrival order.
+    While admission is paused (e.g. under memory pressure) no new waiter is admitted,
+    even if slots are free.
+    """
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.in_use = 0
+        self.admission_paused = False
+        self._waiters = []  # Heap of (deadline, arrival, future)
+        self._arrivals = itertools.count()
+
+    @property
+    def queued(self) -> int:
+        """Number of tasks waiting for a slot"""
+        return sum(1 for _, _, future in self._waiters if not future.done())
+
+    @property
+    def has_free_slot(self) -> bool:
+        """True if a new waiter would be admitted immediately"""
+        return not self.admission_paused and self.in_use < self.limit and not self.queued
+
+    async def acquire(self, deadline: Optional[float] = None) -> None:
+        """
+        Wait for a free slot.
+
+        Args:
+            deadline (float, optional): Wall-clock deadline (epoch seconds) of the waiting task
+        """
+        if self.has_free_slot:
+            self.in_use += 1
+            return
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (deadline if deadline is not None else math.inf, next(self._arrivals), future))
+        try:
+            await future
+        except asyncio.CancelledError:
+            # The slot may have been handed over just as the waiter was cancelled
+            if future.done() and not future.cancelled():
+                self.release()
+            raise
+
+    def release(self) -> None:
+        """Free a slot, handing it directly to the waiter with the earliest deadline"""
+        if self.admission_paused or not self._wake_next():
+            self.in_use -= 1
+
+    def pause_admission(self) -> None:
+        """Stop admitting waiters; running tasks keep their slots"""
+        self.admission_paused = True
+
+    def resume_admission(self) -> None:
+        """Admit waiters again, filling every free slot"""
+        self.admission_paused = False
+        while self.in_use < self.limit and self._wake_next():
+            self.in_use += 1
+
+    def _wake_next(self) -> bool:
+        """Hand a slot to the waiter with the earliest deadline. Returns False if nobody is waiting."""
+        while self._waiters:
+            _, _, future = heapq.heappop(self._waiters)
+            if not future.done():
+                future.set_result(None)
+                return True
+        return False
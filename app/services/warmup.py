@@ -0,0 +1,98 @@
+import asyncio
+import logging
+import os
+import time
+from datetime import datetime, timezone
+
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+# Model whose LLM client is constructed and connected during warm-up
+WARMUP_MODEL_PROVIDER = os.getenv("WARMUP_MODEL_PROVIDER", "openai_chat")
+WARMUP_MODEL_NAME = os.getenv("WARMUP_MODEL_NAME", "gpt-4o")
+# Launch Chromium once, so the first task doesn't pay the cold launch. It stays open as the
+# health probe browser when HEALTH_DEDICATED_BROWSER is on.
+WARMUP_BROWSER = os.getenv("WARMUP_BROWSER", "true").lower() == "true"
+WARMUP_STEP_TIMEOUT_SECONDS = float(os.getenv("WARMUP_STEP_TIMEOUT_SECONDS", "30"))
+
+
+class Warmup:
+    """
+    Background warm-up run from the app lifespan once the server is accepting requests.
+
+    Each step is timed and recorded in the startup report; a failing step is logged
+    and skipped, it never prevents the API from serving.
+    """
+
+    _report: dict = {"import_seconds": None, "ready_seconds": None, "warmup": {}, "warmup_complete": False}
+
+    @classmethod
+    def record_startup(cls, import_seconds: float, ready_seconds: float) -> None:
+        """Record how long the app module took to import and the lifespan took to start"""
+        cls._report["import_seconds"] = round(import_seconds, 3)
+        cls._report["ready_seconds"] = round(ready_seconds, 3)
+
+    @classmethod
+    async def _timed(cls, name: str, coro) -> None:
+        started = time.perf_counter()
+        try:
+            await asyncio.wait_for(coro, timeout=WARMUP_STEP_TIMEOUT_SECONDS)
+            cls._report["warmup"][name] = {"ok": True, "seconds": round(time.perf_counter() - started, 3)}
+        except Exception as e:
+            cls._report["warmup"][name] = {"ok": False, "seconds": round(time.perf_counter() - started, 3),
+                                           "error": str(e) or type(e).__name__}
+            logging.warning(f"Warm-up step {name} failed: {e}")
+
+    @staticmethod
+    async def _import_browser_stack() -> None:
+        from app.services.task_manager import load_browser_agent
+
+        # Imports in a worker thread; tasks created meanwhile wait for the same import off the loop
+        await load_browser_agent()
+
+    @staticmethod
+    async def _warm_llm() -> None:
+        from app.services.llm_factory import LLMFactory
+
+        # The factory caches the instance, so tasks reuse this client and its connection pool
+        llm = LLMFactory.create_llm(WARMUP_MODEL_PROVIDER, model_name=WARMUP_MODEL_NAME)
+        client = getattr(llm, "root_async_client", None)
+        if client is not None:
+            # Any cheap request opens the TLS connection that the first completion will reuse
+            await client.models.list()
+
+    @staticmethod
+    async def _warm_browser() -> None:
+        from app.services.health import HEALTH_DEDICATED_BROWSER, HealthMonitor
+
+        if HEALTH_DEDICATED_BROWSER:
+            # Keep this browser open: health checks of an idle replica probe it
+            await HealthMonitor.start_probe_browser()
+            return
+
+        from playwright.async_api import async_playwright
+
+        async with async_playwright() as playwright:
+            browser = await playwright.chromium.launch(
+                headless=True,
+                args=["--disable-dev-shm-usage", "--no-sandbox", "--disable-setuid-sandbox", "--disable-gpu"]
+            )
+            await browser.close()
+
+    @classmethod
+    async def run(cls) -> None:
+        """Import the browser stack, then pre-warm the LLM client and the browser"""
+        await cls._timed("import_browser_stack", cls._import_browser_stack())
+        await asyncio.gather(
+            cls._timed("llm_connection", cls._warm_llm()),
+            cls._timed("browser_launch", cls._warm_browser()) if WARMUP_BROWSER else asyncio.sleep(0)
+        )
+        cls._report["warmup_complete"] = True
+        cls._report["completed_at"] = datetime.now(timezone.utc).isoformat()
+        logging.info(f"Startup report: {cls._report}")
+
+    @classmethod
+    def get_report(cls) -> dict:
+        return cls._report
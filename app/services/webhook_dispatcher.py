@@ -0,0 +1,143 @@
+import asyncio
+import logging
+import os
+import random
+import time
+from typing import Dict, List, Optional, Set
+
+from dotenv import load_dotenv
+from httpx import AsyncClient, Limits, Timeout
+
+# Load environment variables
+load_dotenv()
+
+WEBHOOK_MAX_RETRIES = int(os.getenv("WEBHOOK_MAX_RETRIES", "5"))
+WEBHOOK_BACKOFF_SECONDS = float(os.getenv("WEBHOOK_BACKOFF_SECONDS", "1"))  # Doubled after every failed attempt
+WEBHOOK_TIMEOUT_SECONDS = float(os.getenv("WEBHOOK_TIMEOUT_SECONDS", "10"))
+# Collect completions per endpoint for this many seconds and send them as one request (0 disables batching)
+WEBHOOK_BATCH_WINDOW_SECONDS = float(os.getenv("WEBHOOK_BATCH_WINDOW_SECONDS", "0"))
+WEBHOOK_BATCH_MAX_SIZE = int(os.getenv("WEBHOOK_BATCH_MAX_SIZE", "50"))
+
+
+class WebhookDispatcher:
+    """
+    Delivers task completion callbacks over a shared HTTP connection pool.
+
+    Without batching every completion is POSTed on its own as a JSON object. With
+    WEBHOOK_BATCH_WINDOW_SECONDS set, completions for the same endpoint are collected
+    and POSTed together as {"events": [...]}. Failed deliveries are retried with
+    exponential backoff; client errors other than 408/429 are not retried.
+    """
+
+    _client: Optional[AsyncClient] = None
+    _pending: Dict[str, List[dict]] = {}  # Batched payloads waiting per endpoint
+    _flushers: Dict[str, asyncio.Task] = {}
+    _deliveries: Set[asyncio.Task] = set()  # Keep references so in-flight deliveries aren't garbage collected
+    _metrics: Dict[str, float] = {
+        "enqueued": 0,
+        "requests_sent": 0,
+        "delivered": 0,
+        "failed": 0,
+        "retries": 0,
+        "total_latency_seconds": 0.0,
+    }
+
+    @classmethod
+    def _get_client(cls) -> AsyncClient:
+        if cls._client is None or cls._client.is_closed:
+            cls._client = AsyncClient(
+                timeout=Timeout(WEBHOOK_TIMEOUT_SECONDS),
+                limits=Limits(max_connections=20, max_keepalive_connections=10)
+            )
+        return cls._client
+
+    @classmethod
+    def enqueue(cls, url: str, payload: dict) -> None:
+        """
+        Schedule delivery of a completion payload to a callback URL.
+        """
+        cls._metrics["enqueued"] += 1
+
+        if WEBHOOK_BATCH_WINDOW_SECONDS <= 0:
+            cls._spawn(cls._deliver(url, payload, events=1))
+            return
+
+        batch = cls._pending.setdefault(url, [])
+        batch.append(payload)
+        if len(batch) >= WEBHOOK_BATCH_MAX_SIZE:
+            cls._flush(url)
+        elif url not in cls._flushers:
+            cls._flushers[url] = asyncio.create_task(cls._flush_after_window(url))
+
+    @classmethod
+    def _spawn(cls, coro) -> None:
+        task = asyncio.create_task(coro)
+        cls._deliveries.add(task)
+        task.add_done_callback(cls._deliveries.discard)
+
+    @classmethod
+    async def _flush_after_window(cls, url: str) -> None:
+        await asyncio.sleep(WEBHOOK_BATCH_WINDOW_SECONDS)
+        cls._flushers.pop(url, None)
+        cls._flush(url)
+
+    @classmethod
+    def _flush(cls, url: str) -> None:
+        """Send everything pending for an endpoint as one batch"""
+        flusher = cls._flushers.pop(url, None)
+        if flusher and flusher is not asyncio.current_task():
+            flusher.cancel()
+        events = cls._pending.pop(url, [])
+        if events:
+            cls._spawn(cls._deliver(url, {"events": events}, events=len(events)))
+
+    @classmethod
+    async def _deliver(cls, url: str, body: dict, events: int) -> bool:
+        """POST a body, retrying with exponential backoff. Returns True once delivered."""
+        client = cls._get_client()
+        for attempt in range(WEBHOOK_MAX_RETRIES + 1):
+            if attempt:
+                cls._metrics["retries"] += 1
+                delay = WEBHOOK_BACKOFF_SECONDS * 2 ** (attempt - 1)
+                await asyncio.sleep(delay + random.uniform(0, delay / 2))
+
+            started = time.monotonic()
+            try:
+                cls._metrics["requests_sent"] += 1
+                response = await client.post(url, json=body)
+                cls._metrics["total_latency_seconds"] += time.monotonic() - started
+                if response.is_success:
+                    cls._metrics["delivered"] += events
+                    return True
+                if response.is_client_error and response.status_code not in (408, 429):
+                    logging.warning(f"Webhook {url} rejected delivery with {response.status_code}, not retrying")
+                    break
+                logging.warning(f"Webhook {url} returned {response.status_code} (attempt {attempt + 1})")
+            except Exception as e:
+                cls._metrics["total_latency_seconds"] += time.monotonic() - started
+                logging.warning(f"Webhook {url} delivery error (attempt {attempt + 1}): {e}")
+
+        cls._metrics["failed"] += events
+        logging.error(f"Giving up on webhook delivery to {url} ({events} events)")
+        return False
+
+    @classmethod
+    def get_metrics(cls) -> dict:
+        """Delivery counters, plus the number of completions not yet delivered"""
+        metrics = dict(cls._metrics)
+        metrics["pending_in_batches"] = sum(len(batch) for batch in cls._pending.values())
+        metrics["in_flight_requests"] = len(cls._deliveries)
+        sent = metrics["requests_sent"]
+        metrics["avg_latency_seconds"] = metrics["total_latency_seconds"] / sent if sent else 0.0
+        return metrics
+
+    @classmethod
+    async def close(cls, timeout: float = 10.0) -> None:
+        """Flush pending batches, wait briefly for in-flight deliveries and close the pool"""
+        for url in list(cls._pending):
+            cls._flush(url)
+        if cls._deliveries:
+            await asyncio.wait(set(cls._deliveries), timeout=timeout)
+        if cls._client is not None:
+            await cls._client.aclose()
+            cls._client = None